@@ -10,12 +10,31 @@ Usage:
 """
 
 import subprocess
+import shutil
 import sys
 import os
-import re
 import json
+import functools
+import tempfile
+import time
+import threading
+import collections
+from http.client import HTTPConnection
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+# Resolved once so every docker call skips the PATH lookup
+DOCKER = shutil.which("docker")
+IMAGE_TAG = "docker-challenge-test"
+# Image size limit in bytes (decimal MB, as shown by `docker images`)
+MAX_IMAGE_BYTES = 200 * 1000 * 1000
+# Seconds before a docker build is killed
+BUILD_TIMEOUT = 300
+# Lines of build output to show when the build fails
+BUILD_LOG_TAIL = 20
+# Seconds to wait for the container to answer /health
+HEALTH_TIMEOUT = 10
+
 # Colors for terminal output
 class Colors:
     GREEN = '\033[92m'
@@ -51,6 +70,47 @@ def print_header():
     print(f"{Colors.CYAN}{'='*60}{Colors.END}\n")
 
 
+@functools.lru_cache(maxsize=1)
+def _dockerfile_text():
+    """Read the Dockerfile once and reuse it across checks."""
+    try:
+        return Path("Dockerfile").read_text(errors="ignore")
+    except FileNotFoundError:
+        return ""
+
+
+@functools.lru_cache(maxsize=1)
+def _analyze_dockerfile():
+    """Scan the Dockerfile in a single pass and collect what the checks need."""
+    info = {
+        "from_images": [],
+        "has_useradd": False,
+        "has_nonroot_user": False,
+        "has_healthcheck": False,
+    }
+    # Split on '\n' only: splitlines() also breaks on \x0b, \x0c, \u2028 etc.,
+    # which Docker, the CI grep and ^ in re.MULTILINE don't treat as line breaks
+    for line in _dockerfile_text().split('\n'):
+        line = line.rstrip('\r')
+        # Text checks match anywhere in the file, including comments
+        if 'useradd' in line or 'adduser' in line:
+            info["has_useradd"] = True
+        if 'HEALTHCHECK' in line:
+            info["has_healthcheck"] = True
+
+        # Instruction checks only look at the first token of the line
+        if not line.startswith(('FROM', 'USER')):
+            continue
+        parts = line.split(None, 2)
+        if len(parts) < 2:
+            continue
+        if parts[0] == 'FROM':
+            info["from_images"].append(parts[1])
+        elif parts[0] == 'USER' and not parts[1].startswith('root'):
+            info["has_nonroot_user"] = True
+    return info
+
+
 def check_dockerfile_exists():
     """Check if Dockerfile exists."""
     return Path("Dockerfile").exists()
@@ -59,11 +119,8 @@ def check_dockerfile_exists():
 def check_multistage():
     """Check if Dockerfile uses multi-stage build."""
     try:
-        with open("Dockerfile", "r") as f:
-            content = f.read()
         # Count FROM statements
-        from_count = len(re.findall(r'^FROM\s+', content, re.MULTILINE))
-        return from_count >= 2
+        return len(_analyze_dockerfile()["from_images"]) >= 2
     except:
         return False
 
@@ -71,10 +128,8 @@ def check_multistage():
 def check_slim_image():
     """Check if final stage uses slim image."""
     try:
-        with open("Dockerfile", "r") as f:
-            content = f.read()
         # Find the last FROM statement
-        from_statements = re.findall(r'^FROM\s+(\S+)', content, re.MULTILINE)
+        from_statements = _analyze_dockerfile()["from_images"]
         if from_statements:
             last_from = from_statements[-1]
             return 'slim' in last_from or 'alpine' in last_from
@@ -86,11 +141,8 @@ def check_slim_image():
 def check_nonroot_user():
     """Check if Dockerfile creates and uses non-root user."""
     try:
-        with open("Dockerfile", "r") as f:
-            content = f.read()
-        has_useradd = 'useradd' in content or 'adduser' in content
-        has_user = re.search(r'^USER\s+(?!root)', content, re.MULTILINE)
-        return has_useradd and has_user
+        info = _analyze_dockerfile()
+        return info["has_useradd"] and info["has_nonroot_user"]
     except:
         return False
 
@@ -98,9 +150,7 @@ def check_nonroot_user():
 def check_healthcheck():
     """Check if Dockerfile defines a health check."""
     try:
-        with open("Dockerfile", "r") as f:
-            content = f.read()
-        return 'HEALTHCHECK' in content
+        return _analyze_dockerfile()["has_healthcheck"]
     except:
         return False
 
@@ -108,10 +158,10 @@ def check_healthcheck():
 def check_dockerignore():
     """Check if .dockerignore exists and has content."""
     try:
-        path = Path(".dockerignore")
-        if not path.exists():
+        try:
+            content = Path(".dockerignore").read_text(errors="ignore")
+        except FileNotFoundError:
             return False
-        content = path.read_text()
         # Check for common patterns
         has_pycache = '__pycache__' in content or '*.pyc' in content
         has_venv = 'venv' in content or '.venv' in content
@@ -120,18 +170,28 @@ def check_dockerignore():
         return False
 
 
+@functools.lru_cache(maxsize=1)
+def _compose_text():
+    """Read docker-compose.yml once. Returns None if it is missing."""
+    try:
+        return Path("docker-compose.yml").read_text(errors="ignore")
+    except FileNotFoundError:
+        return None
+
+
 def check_compose_valid():
-    """Check if docker-compose.yml is valid."""
+    """Check if docker-compose.yml is valid.
+
+    Uses the same text matching as the CI grader (.github/workflows/grade.yml)
+    so both give the same result for a given file.
+    """
     try:
-        if not Path("docker-compose.yml").exists():
+        content = _compose_text()
+        if content is None:
             return False
 
-        with open("docker-compose.yml", "r") as f:
-            content = f.read()
-
         # Check for required elements
         has_api = 'api:' in content
-        has_redis = 'redis:' in content or 'redis:7' in content
         has_ports = '5000:5000' in content
 
         return has_api and has_ports
@@ -140,24 +200,57 @@ def check_compose_valid():
 
 
 def check_image_builds():
-    """Check if Docker image builds successfully."""
-    try:
-        result = subprocess.run(
-            ["docker", "build", "-t", "docker-challenge-test", "."],
-            capture_output=True,
-            text=True,
-            timeout=300
-        )
-        return result.returncode == 0
-    except:
-        return False
-
+    """Check if Docker image builds successfully.
 
-def check_image_size():
+    Returns (passed, image_id, log_tail) where log_tail holds the last lines
+    of build output.
+    """
+    try:
+        # docker build writes the image ID into a private per-run directory
+        with tempfile.TemporaryDirectory() as tmpdir:
+            iidfile = Path(tmpdir) / "image.iid"
+            passed, log_tail = _run_build(iidfile)
+            image_id = iidfile.read_text().strip() if iidfile.exists() else None
+        return passed, image_id, log_tail
+    except Exception as e:
+        return False, None, [str(e)]
+
+
+def _run_build(iidfile):
+    """Run docker build, returning (passed, log_tail)."""
+    # Stream the build log instead of buffering it; only the tail is kept
+    process = subprocess.Popen(
+        [DOCKER, "build", "-t", IMAGE_TAG, "--iidfile", str(iidfile), "."],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors="replace"
+    )
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        process.kill()
+
+    timer = threading.Timer(BUILD_TIMEOUT, kill)
+    timer.start()
+    try:
+        log_tail = collections.deque(process.stderr, maxlen=BUILD_LOG_TAIL)
+        process.wait()
+    finally:
+        timer.cancel()
+        process.stderr.close()
+    if timed_out.is_set():
+        log_tail.append(f"build timed out after {BUILD_TIMEOUT}s")
+        return False, list(log_tail)
+    return process.returncode == 0, list(log_tail)
+
+
+def check_image_size(image=IMAGE_TAG):
     """Check if image size is under 200MB."""
     try:
         result = subprocess.run(
-            ["docker", "images", "docker-challenge-test", "--format", "{{.Size}}"],
+            [DOCKER, "image", "inspect", image, "--format", "{{.Size}}"],
             capture_output=True,
             text=True,
             timeout=30
@@ -165,16 +258,9 @@ def check_image_size():
         if result.returncode != 0:
             return False, "Image not found"
 
-        size_str = result.stdout.strip()
-        # Parse size (e.g., "142MB", "1.2GB")
-        if 'GB' in size_str:
-            size_mb = float(size_str.replace('GB', '')) * 1024
-        elif 'MB' in size_str:
-            size_mb = float(size_str.replace('MB', ''))
-        else:
-            return False, f"Unknown size format: {size_str}"
-
-        return size_mb < 200, f"{size_str}"
+        # Compare raw bytes so there is no rounding near the limit
+        size_bytes = int(result.stdout.strip())
+        return size_bytes < MAX_IMAGE_BYTES, f"{size_bytes / 1e6:.1f}MB"
     except Exception as e:
         return False, str(e)
 
@@ -183,13 +269,13 @@ def check_container_runs():
     """Check if container runs and responds to health check."""
     try:
         # Stop any existing container
-        subprocess.run(["docker", "rm", "-f", "docker-challenge-test-container"],
+        subprocess.run([DOCKER, "rm", "-f", "docker-challenge-test-container"],
                       capture_output=True, timeout=10)
 
         # Run container
         result = subprocess.run(
-            ["docker", "run", "-d", "--name", "docker-challenge-test-container",
-             "-p", "5001:5000", "docker-challenge-test"],
+            [DOCKER, "run", "-d", "--name", "docker-challenge-test-container",
+             "-p", "5001:5000", IMAGE_TAG],
             capture_output=True,
             text=True,
             timeout=30
@@ -198,21 +284,26 @@ def check_container_runs():
         if result.returncode != 0:
             return False
 
-        # Wait for container to start
-        import time
-        time.sleep(3)
-
-        # Test health endpoint
-        import urllib.request
-        try:
-            response = urllib.request.urlopen("http://localhost:5001/health", timeout=5)
-            data = json.loads(response.read())
-            success = data.get("status") == "healthy"
-        except:
-            success = False
+        # Poll the health endpoint until the app accepts connections
+        success = False
+        deadline = time.monotonic() + HEALTH_TIMEOUT
+        while time.monotonic() < deadline:
+            conn = HTTPConnection("localhost", 5001, timeout=5)
+            try:
+                conn.request("GET", "/health")
+                data = json.loads(conn.getresponse().read())
+                success = data.get("status") == "healthy"
+                break
+            except OSError:
+                # Not listening yet (or the port proxy dropped the connection)
+                time.sleep(0.1)
+            except:
+                break
+            finally:
+                conn.close()
 
         # Cleanup
-        subprocess.run(["docker", "rm", "-f", "docker-challenge-test-container"],
+        subprocess.run([DOCKER, "rm", "-f", "docker-challenge-test-container"],
                       capture_output=True, timeout=10)
 
         return success
@@ -225,9 +316,7 @@ def run_checks():
     print_header()
 
     # Check if Docker is available
-    try:
-        subprocess.run(["docker", "--version"], capture_output=True, timeout=5)
-    except:
+    if DOCKER is None:
         print(f"  {Colors.RED}❌ Docker is not installed or not running{Colors.END}")
         print(f"  {Colors.YELLOW}Please install Docker Desktop first{Colors.END}\n")
         return
@@ -246,27 +335,36 @@ def run_checks():
         (check_compose_valid, "docker-compose.yml valid"),
     ]
 
-    print(f"  {Colors.BOLD}Checking files...{Colors.END}\n")
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        # Start the build first so the file checks run while it is in progress
+        build_future = executor.submit(check_image_builds)
+        futures = {executor.submit(func): name for func, name in checks_funcs}
+        file_results = {}
+        for future in as_completed(futures):
+            file_results[futures[future]] = future.result()
 
-    # File checks
-    for func, name in checks_funcs:
-        check = next(c for c in CHECKS if c["name"] == name)
-        total_points += check["points"]
+        print(f"  {Colors.BOLD}Checking files...{Colors.END}\n")
 
-        passed = func()
-        if passed:
-            earned_points += check["points"]
-            print(f"  {Colors.GREEN}✅{Colors.END} {name} ({check['points']} pts)")
-        else:
-            print(f"  {Colors.RED}❌{Colors.END} {name} (0/{check['points']} pts)")
+        # File checks
+        for func, name in checks_funcs:
+            check = next(c for c in CHECKS if c["name"] == name)
+            total_points += check["points"]
+
+            if file_results[name]:
+                earned_points += check["points"]
+                print(f"  {Colors.GREEN}✅{Colors.END} {name} ({check['points']} pts)")
+            else:
+                print(f"  {Colors.RED}❌{Colors.END} {name} (0/{check['points']} pts)")
+
+        # Build check
+        print(f"\n  {Colors.BOLD}Building image...{Colors.END}\n")
 
-    # Build check
-    print(f"\n  {Colors.BOLD}Building image...{Colors.END}\n")
+        image_built, image_id, build_log = build_future.result()
 
     build_check = next(c for c in CHECKS if c["name"] == "Image builds successfully")
     total_points += build_check["points"]
 
-    if check_image_builds():
+    if image_built:
         earned_points += build_check["points"]
         print(f"  {Colors.GREEN}✅{Colors.END} Image builds successfully ({build_check['points']} pts)")
 
@@ -274,7 +372,7 @@ def run_checks():
         size_check = next(c for c in CHECKS if c["name"] == "Image size < 200MB")
         total_points += size_check["points"]
 
-        passed, size_info = check_image_size()
+        passed, size_info = check_image_size(image_id or IMAGE_TAG)
         if passed:
             earned_points += size_check["points"]
             print(f"  {Colors.GREEN}✅{Colors.END} Image size < 200MB ({size_info}) ({size_check['points']} pts)")
@@ -295,6 +393,8 @@ def run_checks():
     else:
         print(f"  {Colors.RED}❌{Colors.END} Image build failed (0/{build_check['points']} pts)")
         print(f"  {Colors.YELLOW}   → Fix Dockerfile errors first{Colors.END}")
+        for line in build_log:
+            print(f"     {line.rstrip()}")
         total_points += 15  # Add points for size and run checks
 
     # Summary
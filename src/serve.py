@@ -0,0 +1,65 @@
+"""
+Production Server for Docker Challenge
+======================================
+Runs the Flask API under Gunicorn instead of the Werkzeug dev server.
+
+Usage:
+    python src/serve.py
+"""
+
+import os
+
+from gunicorn.app.base import BaseApplication
+
+
+class StandaloneApplication(BaseApplication):
+    """Gunicorn application that serves an already-imported WSGI app."""
+
+    def __init__(self, application, options=None):
+        self.application = application
+        self.options = options or {}
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key.lower(), value)
+
+    def load(self):
+        return self.application
+
+
+# Upper bound on the default worker count; each worker has its own Redis pool
+MAX_DEFAULT_WORKERS = 8
+
+
+def default_workers():
+    """2*CPU+1 workers, counting only the CPUs this process may run on."""
+    if hasattr(os, 'sched_getaffinity'):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    return min(cpus * 2 + 1, MAX_DEFAULT_WORKERS)
+
+
+def serve(application, host, port):
+    """Serve the app with Gunicorn threaded workers."""
+    # WEB_CONCURRENCY is the usual Gunicorn knob for limiting workers in containers
+    workers = int(os.getenv('WEB_CONCURRENCY', default_workers()))
+    options = {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "worker_class": "gthread",
+        "threads": int(os.getenv('GUNICORN_THREADS', 4)),
+    }
+    StandaloneApplication(application, options).run()
+
+
+if __name__ == '__main__':
+    from app import app
+
+    port = int(os.getenv('FLASK_RUN_PORT', 5000))
+    host = os.getenv('FLASK_RUN_HOST', '0.0.0.0')
+
+    print(f"Starting Gunicorn on {host}:{port}")
+    serve(app, host, port)